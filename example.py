@@ -1,8 +1,62 @@
 import sys
 from manager import *
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import solve_ivp
+import h5py
+from numba import njit, prange
+from fhn_kernel import _rk4_inner
+
+logger = logging.getLogger(__name__)
+
+@njit(cache=True, fastmath=True)
+def _fhn_rhs(t, y, a, b, tau, I):
+    v, w = y[0], y[1]
+    out = np.empty(2)
+    out[0] = v - v*v*v/3.0 - w + I
+    out[1] = (v + a - b*w) / tau
+    return out
+
+@njit(cache=True)
+def _fhn_jac(t, y, a, b, tau):
+    jac = np.empty((2, 2))
+    jac[0, 0] = 1.0 - y[0]*y[0]
+    jac[0, 1] = -1.0
+    jac[1, 0] = 1.0 / tau
+    jac[1, 1] = -b / tau
+    return jac
+
+@njit(cache=True, parallel=True)
+def _sweep_fhn(params, y0s, t, out):
+    for i in prange(params.shape[0]):
+        _rk4_inner(params[i], y0s[i], t, out[i])
+
+## C callback for numbalsoda, parameters are packed as p = [a, b, tau, I]
+def _fhn_rhs_c(t, y, dy, p):
+    dy[0] = y[0] - y[0]*y[0]*y[0]/3.0 - y[1] + p[3]
+    dy[1] = (y[0] + p[0] - p[1]*y[1]) / p[2]
+
+## numbalsoda compiles its driver on import, so it is loaded on first use
+_lsoda = None
+
+def _get_lsoda():
+    global _lsoda
+    if _lsoda is None:
+        from numba import cfunc
+        from numbalsoda import lsoda, lsoda_sig
+        _lsoda = (lsoda, cfunc(lsoda_sig, cache=True)(_fhn_rhs_c))
+    return _lsoda
+
+## AOT-compiled RK4 kernel, built with `python fhn_kernel.py`; None until the
+## first RK4 run, False if it has not been built
+_rk4_aot = None
+
+def _get_rk4_aot():
+    global _rk4_aot
+    if _rk4_aot is None:
+        try:
+            from fhn_kernel_aot import rk4 as _rk4_aot
+        except ImportError:
+            _rk4_aot = False
+    return _rk4_aot
 
 class FHN(SimulationManager):
     ## Default simulation parameters
@@ -14,38 +68,214 @@ class FHN(SimulationManager):
         "dt": 0.01,
         'y0': [0.1, 0.0],
         "tend": 100,
+        "rtol": 1e-6,
+        "atol": 1e-9,
     }
 
+    ## Read-only float64 time grids shared by all instances, keyed by (tend, dt).
+    ## The cache is never pruned; it holds one grid per distinct (tend, dt).
+    _t_cache = {}
+
     def __init__(self, config, seed=None, log_info=None):
         super().__init__(config, seed, log_info)
 
-        self.method = self.config.get('method', False) or 'RK45'
+        self.method = self.config.get('method', False) or 'LSODA'
         
-        self.t = np.arange(0, self.tend+self.dt, self.dt)
-        self.v = None
-        self.w = None
+        key = (self.tend, self.dt)
+        self.t = FHN._t_cache.get(key)
+        if self.t is None:
+            self.t = np.arange(0, self.tend+self.dt, self.dt, dtype=np.float64)
+            self.t.flags.writeable = False
+            FHN._t_cache[key] = self.t
+
+        ## Output buffers, reused by every call to run(). They start as NaN so
+        ## saving or plotting before run() cannot pass off garbage as data.
+        self._v = np.full(self.t.shape, np.nan, dtype=np.float64)
+        self._w = np.full(self.t.shape, np.nan, dtype=np.float64)
+
+        ## Dense solution from solve_ivp, sampled on self.t only when accessed
+        self._sol = None
+        self._sol_pending = False
+
+    @property
+    def v(self):
+        self._materialize()
+        return self._v
+
+    @property
+    def w(self):
+        self._materialize()
+        return self._w
+
+    def _materialize(self):
+        if self._sol_pending:
+            v, w = self._sol_at(self.t)
+            np.copyto(self._v, v)
+            np.copyto(self._w, w)
+            self._sol_pending = False
+
+    def _sol_at(self, t):
+        ## If the solver stopped early, the dense output only covers
+        ## [0, sol.t[-1]]; times past that point are NaN rather than extrapolated
+        y = self._sol.sol(t)
+        if not self._sol.success:
+            y[..., np.asarray(t) > self._sol.t[-1]] = np.nan
+        return y
+
+    def sample(self, t):
+        """
+        Evaluate the solution at arbitrary times using the dense output of the
+        last solve_ivp run, or by interpolating the stored traces otherwise.
+        """
+        if self._sol is not None:
+            return self._sol_at(t)
+        return np.array([np.interp(t, self.t, self._v), np.interp(t, self.t, self._w)])
 
     def fhn_system(self, t, y):
-        v, w = y
-        dv = v - (v ** 3) / 3 - w + self.I
-        dw = (v + self.a - self.b * w) / self.tau
-        return [dv, dw]
+        return _fhn_rhs(t, y, self.a, self.b, self.tau, self.I)
+
+    def fhn_jac(self, t, y):
+        return _fhn_jac(t, y, self.a, self.b, self.tau)
 
     def run(self):
-        sol = solve_ivp(self.fhn_system, [0, self.tend], self.y0, 
-                        t_eval=self.t, method=self.method)
-        self.v, self.w = sol.y
+        self._sol, self._sol_pending = None, False
+
+        ## Bind parameters to locals so the callbacks do no attribute lookups
+        a, b, tau, I = self.a, self.b, self.tau, self.I
+
+        ## LSODA runs entirely in native code via numbalsoda. solve_ivp keeps
+        ## references to returned derivatives, so its RHS returns a fresh array
+        ## per call rather than a shared buffer.
+        if self.method == 'LSODA':
+            self._run_lsoda()
+        elif self.method == 'RK4':
+            self._run_rk4()
+        elif self.method == 'RK45':
+            self._run_rk45(lambda t, y: _fhn_rhs(t, y, a, b, tau, I))
+        else:
+            self._run_solve_ivp(lambda t, y: _fhn_rhs(t, y, a, b, tau, I))
+
+    def _run_lsoda(self):
+        lsoda, rhs_c = _get_lsoda()
+        data = np.array([self.a, self.b, self.tau, self.I], dtype=np.float64)
+        usol, success = lsoda(rhs_c.address,
+                              np.asarray(self.y0, dtype=np.float64),
+                              np.asarray(self.t, dtype=np.float64), data=data,
+                              rtol=self.rtol, atol=self.atol)
+        np.copyto(self._v, usol[:, 0])
+        np.copyto(self._w, usol[:, 1])
+
+        if not success:
+            logger.warning('LSODA integration did not complete successfully')
+
+    def _run_rk4(self):
+        ## Fixed-step RK4 on self.t, preferring the AOT-compiled kernel
+        p = np.array([self.a, self.b, self.tau, self.I], dtype=np.float64)
+        t = np.asarray(self.t, dtype=np.float64)
+        y0 = np.asarray(self.y0, dtype=np.float64)
+        rk4_aot = _get_rk4_aot()
+        if rk4_aot:
+            usol = rk4_aot(p, t, y0)
+        else:
+            usol = np.empty((t.size, 2))
+            _rk4_inner(p, y0, t, usol)
+        np.copyto(self._v, usol[:, 0])
+        np.copyto(self._w, usol[:, 1])
+
+    def _run_rk45(self, rhs):
+        from scipy.integrate import solve_ivp
+
+        ## Compile the jitted RHS before handing it to the solver
+        rhs(self.t[0], np.asarray(self.y0, dtype=np.float64))
+
+        ## A single call fills the whole grid; restarting the integrator at
+        ## every output point would redo its initial step selection each time
+        sol = solve_ivp(rhs, [self.t[0], self.t[-1]], self.y0, method='RK45',
+                        t_eval=self.t, rtol=self.rtol, atol=self.atol)
+
+        ## If the solver stopped early, samples past the failure stay NaN
+        n = sol.t.size
+        self._v[:n], self._w[:n] = sol.y
+        self._v[n:] = np.nan
+        self._w[n:] = np.nan
+
+        if not sol.success:
+            logger.warning(f'RK45 integration failed: {sol.message}')
+
+    def _run_solve_ivp(self, rhs):
+        from scipy.integrate import solve_ivp
+
+        ## Compile the jitted RHS before handing it to the solver
+        rhs(self.t[0], np.asarray(self.y0, dtype=np.float64))
+
+        ## Implicit solvers use the analytic Jacobian instead of finite differences
+        options = {}
+        if self.method in ('Radau', 'BDF'):
+            a, b, tau = self.a, self.b, self.tau
+            options['jac'] = lambda t, y: _fhn_jac(t, y, a, b, tau)
+
+        ## Let the solver take its own adaptive steps; v and w are sampled
+        ## from the dense output on first access
+        sol = solve_ivp(rhs, [self.t[0], self.t[-1]], self.y0, method=self.method,
+                        dense_output=True, rtol=self.rtol, atol=self.atol,
+                        **options)
+        if not sol.success:
+            logger.warning(f'{self.method} integration failed: {sol.message}')
+
+        self._sol, self._sol_pending = sol, True
+
+    def run_sweep(self, params, y0s=None):
+        """
+        Integrate many independent FHN instances in parallel with fixed-step RK4
+        on the grid self.t.
+
+        Args:
+            params (array_like): Array of shape (n_trials, 4) with columns (a, b, tau, I).
+            y0s (array_like): Initial conditions of shape (n_trials, 2). Defaults to
+                self.y0 for every trial.
+
+        Returns:
+            np.ndarray: Trajectories of shape (n_trials, len(self.t), 2) holding (v, w).
+
+        Raises:
+            ValueError: If params is not of shape (n_trials, 4) or y0s is not of
+                shape (n_trials, 2).
+        """
+        params = np.ascontiguousarray(params, dtype=np.float64)
+        if params.ndim != 2 or params.shape[1] != 4:
+            raise ValueError(f"params must have shape (n_trials, 4), got {params.shape}.")
+
+        if y0s is None:
+            y0s = np.tile(np.asarray(self.y0, dtype=np.float64), (params.shape[0], 1))
+        y0s = np.ascontiguousarray(y0s, dtype=np.float64)
+        if y0s.shape != (params.shape[0], 2):
+            raise ValueError(f"y0s must have shape ({params.shape[0]}, 2), got {y0s.shape}.")
+
+        out = np.empty((params.shape[0], self.t.size, 2))
+        _sweep_fhn(params, y0s, self.t, out)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f'integrated parameter sweep of {params.shape[0]} trials')
+        return out
 
     def save_data(self):
-        # Save data to HDF5 file
+        # Save (time, v, w) to HDF5 as one chunked, compressed dataset with a
+        # compound dtype. The traces are stored in single precision; time and
+        # the integration itself stay in float64.
+        twv = np.empty(self.t.size, dtype=[('time', 'f8'), ('v', 'f4'), ('w', 'f4')])
+        twv['time'], twv['v'], twv['w'] = self.t, self.v, self.w
+
         with h5py.File(self.hdf5_path, "w") as h5file:
-            h5file.create_dataset("time", data=self.t)
-            h5file.create_dataset("v", data=self.v)
-            h5file.create_dataset("w", data=self.w)
+            h5file.create_dataset("twv", data=twv, chunks=(min(twv.size, 8192),),
+                                  compression='lzf', shuffle=True)
 
-        logging.info(f'saved simulation data to {self.hdf5_path}')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f'saved simulation data to {self.hdf5_path}')
 
     def plot_results(self):
+        ## Plotting dependencies are only imported when needed
+        import matplotlib.pyplot as plt
+
         fig, axs = plt.subplots(2,1, figsize=(6, 8))
 
         # Plot time series
@@ -62,7 +292,8 @@ class FHN(SimulationManager):
         v_nullcline = np.linspace(-2, 2, 500)
 
         # Nullcline for dv/dt = 0
-        w_v_nullcline = v_nullcline - (v_nullcline ** 3) / 3 + self.I
+        v = v_nullcline
+        w_v_nullcline = v * (1.0 - v*v/3.0) + self.I
         axs[1].plot(v_nullcline, w_v_nullcline, 'r--', label="dv/dt = 0")
 
         # Nullcline for dw/dt = 0
@@ -0,0 +1,50 @@
+"""
+Fixed-step RK4 integrator for the FitzHugh-Nagumo model, with an
+ahead-of-time compiled entry point.
+
+Build the extension module once with
+
+    python fhn_kernel.py
+
+which writes the `fhn_kernel_aot` shared library next to this file. `FHN` in
+example.py uses it for the 'RK4' method when it is importable, and calls the
+JIT-compiled `_rk4_inner` below otherwise. Parameters are packed everywhere as
+p = [a, b, tau, I]. `numba.pycc` is only imported when building, so importing
+this module for the JIT kernels does not load it.
+"""
+import os
+import numpy as np
+from numba import njit
+
+@njit(cache=True, fastmath=True)
+def _fhn_f(v, w, a, b, tau, I):
+    return v - v*v*v/3.0 - w + I, (v + a - b*w) / tau
+
+@njit(cache=True, fastmath=True)
+def _rk4_inner(p, y0, t, out):
+    ## Fixed-step RK4 on the grid t, with the 2-D state kept in scalars
+    a, b, tau, I = p[0], p[1], p[2], p[3]
+    v, w = y0[0], y0[1]
+    out[0, 0], out[0, 1] = v, w
+    for k in range(1, t.size):
+        h = t[k] - t[k-1]
+        k1v, k1w = _fhn_f(v, w, a, b, tau, I)
+        k2v, k2w = _fhn_f(v + 0.5*h*k1v, w + 0.5*h*k1w, a, b, tau, I)
+        k3v, k3w = _fhn_f(v + 0.5*h*k2v, w + 0.5*h*k2w, a, b, tau, I)
+        k4v, k4w = _fhn_f(v + h*k3v, w + h*k3w, a, b, tau, I)
+        v += h * (k1v + 2*k2v + 2*k3v + k4v) / 6
+        w += h * (k1w + 2*k2w + 2*k3w + k4w) / 6
+        out[k, 0], out[k, 1] = v, w
+
+def rk4(p, t, y0):
+    out = np.empty((t.size, 2))
+    _rk4_inner(p, y0, t, out)
+    return out
+
+if __name__ == "__main__":
+    from numba.pycc import CC
+
+    cc = CC('fhn_kernel_aot')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export('rk4', 'f8[:,:](f8[:], f8[:], f8[:])')(rk4)
+    cc.compile()
@@ -1,8 +1,10 @@
-import os, h5py, logging, json
+import os, logging, orjson
 from abc import ABC, abstractmethod
 from datetime import datetime
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class SimulationManager(ABC):
     """
     SimulationManager is an abstract base class designed to manage simulation configurations, 
@@ -28,8 +30,8 @@ class SimulationManager(ABC):
             Sets the configuration and parameters for the simulation. Accepts either a 
             dictionary or a path to a JSON file.
         _setup_directories(log_info):
-            Creates necessary directories for the simulation, sets up logging, and initializes 
-            files like Readme.md and an HDF5 file for storing data.
+            Creates necessary directories for the simulation, sets up logging, writes the 
+            Readme.md file and sets the path of the HDF5 file for storing data.
         _setup_logging(log_info):
             Configures logging for the simulation, with options for different logging levels 
             based on the provided log_info.
@@ -40,6 +42,9 @@ class SimulationManager(ABC):
             Abstract method that must be implemented by subclasses to execute the simulation.
     """
 
+    ## Whether a 'silent' instance has disabled logging process-wide
+    _logging_disabled = False
+
     def __init__(self, config, seed, log_info):
         """
         Initialize the SimulationManager instance.
@@ -49,6 +54,8 @@ class SimulationManager(ABC):
             seed (int): Seed for random number generation to ensure reproducibility.
             log_info (str): Logging configuration information.
         """
+        log_info = log_info or ''
+
         ## Set up the configuration and parameters
         self._set_config(config)
 
@@ -80,16 +87,16 @@ class SimulationManager(ABC):
         if isinstance(config, dict):
             self.config = config
         elif isinstance(config, str) and os.path.isfile(config):
-            with open(config, 'r') as f:
-                self.config = json.load(f)
+            with open(config, 'rb') as f:
+                self.config = orjson.loads(f.read())
         else:
             raise ValueError("Config must be a dictionary or a valid path to a JSON file.")
         
         ## Ensure the subclass has a 'default_params' attribute and merge it with the provided params
-        assert hasattr(self, 'default_params') and isinstance(getattr(self, 'default_params'), dict), \
+        default_params = getattr(self, 'default_params', None)
+        assert isinstance(default_params, dict), \
             f"{self.__class__} must have a dictionary 'default_params'!"
-        self.params = self.default_params.copy()
-        self.params.update(self.config['params'])
+        self.params = {**default_params, **self.config['params']}
 
     def _setup_directories(self, log_info):
         """
@@ -119,22 +126,16 @@ class SimulationManager(ABC):
 
         ## Create a 'Readme.md' file and write the simulation description
         readme_path = os.path.join(os.path.dirname(self.sim_path), "Readme.md")
+        desc = self.config.get('description') or "No description provided."
+        logger.debug(f"Simulation description: {desc}")
         with open(readme_path, "w") as readme_file:
-            print(self.config['description'])
-            if 'description' in self.config and bool(self.config['description']):
-                desc = self.config['description']
-                print("dlfghsdkljfghsldkfg")
-            else:
-                desc = "No description provided."
             readme_file.write(desc)
 
-        ## Create an HDF5 file for storing simulation data
+        ## Path of the HDF5 file for storing simulation data, created on first write
         self.hdf5_path = os.path.join(self.sim_path, f"data_{self.trial}.hdf5")
-        with h5py.File(self.hdf5_path, "w") as h5file:
-            pass  ## Create an empty HDF5 file
 
         ## Log the setup details
-        logging.info(f"Simulation directory: '{self.sim_path}'.")
+        logger.info(f"Simulation directory: '{self.sim_path}'.")
 
     def _setup_logging(self, log_info):
         """
@@ -143,6 +144,17 @@ class SimulationManager(ABC):
         Args:
             log_info (str): Logging configuration information.
         """
+        ## Disable logging entirely (and skip the log file) if 'silent' is specified
+        if 'silent' in log_info:
+            logging.disable(logging.CRITICAL)
+            SimulationManager._logging_disabled = True
+            return
+
+        ## Only undo a disable applied by a previous silent instance
+        if SimulationManager._logging_disabled:
+            logging.disable(logging.NOTSET)
+            SimulationManager._logging_disabled = False
+
         ## Set the default logging level and log file path
         level = logging.INFO
         filename = os.path.join(self.sim_path, 'sim.log')
@@ -163,13 +175,16 @@ class SimulationManager(ABC):
         ## Update the configuration with the merged parameters
         self.config['params'] = self.params
 
-        ## Save the configuration to a JSON file
+        ## Save the configuration to a JSON file; numpy arrays in params are serialized as
+        ## lists and non-string keys are converted to strings, as json.dump did
         config_path = os.path.join(os.path.dirname(self.sim_path), "config.json")
-        with open(config_path, "w") as config_file:
-            json.dump(self.config, config_file, indent=4)
+        with open(config_path, "wb") as config_file:
+            config_file.write(orjson.dumps(self.config,
+                                           option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                                                  | orjson.OPT_NON_STR_KEYS))
 
         ## Log the configuration save operation
-        logging.info(f"Saved config to '{config_path}'.")
+        logger.info(f"Saved config to '{config_path}'.")
 
     @abstractmethod
     def run(self):